@@ -0,0 +1,17 @@
+#
+# This file is part of LiteX-Boards.
+#
+# Copyright (c) 2021 Antmicro <www.antmicro.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+from litex.soc.integration.soc_core import soc_core_args
+from litex.soc.integration.builder import builder_args
+
+# Common target arguments --------------------------------------------------------------------------
+
+def add_common_args(parser):
+    """Register the arguments shared by every target (build/load + Builder/SoCCore args)."""
+    parser.add_argument("--build", action="store_true", help="Build bitstream")
+    parser.add_argument("--load",  action="store_true", help="Load bitstream")
+    builder_args(parser)
+    soc_core_args(parser)
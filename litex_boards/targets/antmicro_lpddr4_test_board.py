@@ -6,14 +6,19 @@
 # SPDX-License-Identifier: BSD-2-Clause
 
 import os
+import sys
+import logging
 import argparse
+import itertools
 
 from migen import *
 
 from litex_boards.platforms import lpddr4_test_board
+from litex_boards.targets._common import add_common_args
 from litex.build.xilinx.vivado import vivado_build_args, vivado_build_argdict
 
 from litex.soc.cores.clock import *
+from litex.soc.integration.soc import SoCRegion
 from litex.soc.integration.soc_core import *
 from litex.soc.integration.builder import *
 from litex.soc.cores.led import LedChaser
@@ -24,10 +29,33 @@ from litedram.phy import lpddr4
 from liteeth.phy import LiteEthS7PHYRGMII
 from litehyperbus.core.hyperbus import HyperRAM
 
+from pprint import pprint
+
+# DFI signals observed by the LiteScope analyzer: the control group is captured on every phase,
+# phase 0 additionally carries command/data fields.
+_DFI_NAMES_ALL = ("cas_n", "cs_n", "ras_n", "we_n", "cke", "odt", "reset_n",
+                  "wrdata_en", "rddata_en", "rddata_valid")
+_DFI_NAMES_P0  = _DFI_NAMES_ALL + ("address", "bank", "wrdata", "rddata")
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def dump(obj):
+    # Buffer the whole dump and emit it with a single print instead of one write per field.
+    name  = obj.__class__.__name__
+    lines = [" " + name, " " + "-" * len(name)]
+    d = obj if isinstance(obj, dict) else vars(obj)
+    for var, val in d.items():
+        if var == "self":
+            continue
+        if type(val) is Signal:
+            val = f"Signal(reset={val.reset.value})"
+        lines.append(f"  {var}: {val}")
+    print("\n".join(lines))
+
 # CRG ----------------------------------------------------------------------------------------------
 
 class _CRG(Module):
-    def __init__(self, platform, sys_clk_freq, iodelay_clk_freq):
+    def __init__(self, platform, sys_clk_freq, iodelay_clk_freq, clk100=None):
         self.clock_domains.cd_sys    = ClockDomain()
         self.clock_domains.cd_sys2x  = ClockDomain(reset_less=True)
         self.clock_domains.cd_sys8x  = ClockDomain(reset_less=True)
@@ -35,8 +63,11 @@ class _CRG(Module):
 
         # # #
 
+        if clk100 is None:
+            clk100 = platform.request("clk100")
+
         self.submodules.pll = pll = S7PLL(speedgrade=-1)
-        pll.register_clkin(platform.request("clk100"), 100e6)
+        pll.register_clkin(clk100, 100e6)
         pll.create_clkout(self.cd_sys,    sys_clk_freq)
         pll.create_clkout(self.cd_sys2x,  2 * sys_clk_freq)
         pll.create_clkout(self.cd_sys8x,  8 * sys_clk_freq)
@@ -55,7 +86,8 @@ class BaseSoC(SoCCore):
     def __init__(self, *, sys_clk_freq=int(50e6), iodelay_clk_freq=200e6,
             with_ethernet=False, with_etherbone=False, eth_ip="192.168.1.50", eth_dynamic_ip=False,
             with_hyperram=False, with_sdcard=False, with_jtagbone=True, with_uartbone=False,
-            ident_version=True, **kwargs):
+            with_analyzer=False, analyzer_depth=128, analyzer_signals="all",
+            ident_version=True, debug_sdram=False, **kwargs):
         platform = lpddr4_test_board.Platform()
 
         # SoCCore ----------------------------------------------------------------------------------
@@ -73,17 +105,26 @@ class BaseSoC(SoCCore):
                 iodelay_clk_freq = iodelay_clk_freq,
                 sys_clk_freq     = sys_clk_freq,
             )
+            module = MT53E256M16D1(sys_clk_freq, "1:8")
             self.add_sdram("sdram",
                 phy                     = self.ddrphy,
-                module                  = MT53E256M16D1(sys_clk_freq, "1:8"),
-                l2_cache_size           = kwargs.get("l2_size", 8192),
+                module                  = module,
+                l2_cache_size           = kwargs.get("l2_size", 16384),
                 l2_cache_min_data_width = 256,
             )
+            if debug_sdram:
+                print("=" * 80)
+                dump(self.ddrphy.settings)
+                dump(module.geom_settings)
+                dump(module.timing_settings)
+                pprint(self.ddrphy.dfi.layout[0])
+                print("=" * 80)
 
         # HyperRAM ---------------------------------------------------------------------------------
         if with_hyperram:
             self.submodules.hyperram = HyperRAM(platform.request("hyperram"))
-            self.register_mem("hyperram", self.mem_map["hyperram"], self.hyperram.bus, 8*1024*1024)
+            self.bus.add_slave("hyperram", slave=self.hyperram.bus,
+                region=SoCRegion(origin=self.mem_map["hyperram"], size=8*1024*1024))
 
         # SD Card ----------------------------------------------------------------------------------
         if with_sdcard:
@@ -94,9 +135,11 @@ class BaseSoC(SoCCore):
             # Traces between PHY and FPGA introduce ignorable delays of ~0.165ns +/- 0.015ns.
             # PHY chip does not introduce delays on TX (FPGA->PHY), however it includes 1.2ns
             # delay for RX CLK so we only need 0.8ns to match the desired 2ns.
+            eth_clocks_pads = platform.request("eth_clocks")
+            eth_pads        = platform.request("eth")
             self.submodules.ethphy = LiteEthS7PHYRGMII(
-                clock_pads = self.platform.request("eth_clocks"),
-                pads       = self.platform.request("eth"),
+                clock_pads = eth_clocks_pads,
+                pads       = eth_pads,
                 rx_delay   = 0.8e-9,
             )
             if with_ethernet:
@@ -112,21 +155,89 @@ class BaseSoC(SoCCore):
         if with_uartbone:
             self.add_uartbone("serial", baudrate=1e6)
 
+        # Analyzer ---------------------------------------------------------------------------------
+        if with_analyzer:
+            from litescope import LiteScopeAnalyzer
+            assert hasattr(self, "ddrphy"), "Analyzer observes the DFI, build without integrated main RAM."
+            phases = self.ddrphy.dfi.phases
+            if analyzer_signals == "ctrl":
+                chain = (getattr(phase, name) for phase in phases for name in _DFI_NAMES_ALL)
+            elif analyzer_signals == "data":
+                chain = (getattr(phases[0], name) for name in _DFI_NAMES_P0)
+            else:
+                chain = itertools.chain(
+                    (getattr(phase, name) for phase in phases[1:] for name in _DFI_NAMES_ALL),
+                    (getattr(phases[0], name) for name in _DFI_NAMES_P0))
+            # Collect the signals and accumulate the capture width in the same pass. Wide signals
+            # (data buses) are grouped ahead of the single-bit controls to keep related bits
+            # contiguous in the capture word; each signal keeps its own name in analyzer.csv, so
+            # the ordering does not change the capture semantics.
+            wide       = []
+            narrow     = []
+            data_width = 0
+            for sig in chain:
+                (wide if len(sig) >= 16 else narrow).append(sig)
+                data_width += len(sig)
+            signals = wide + narrow
+            print(f"LiteScope data_width = {data_width}")
+            self.submodules.analyzer = LiteScopeAnalyzer(signals,
+                depth        = analyzer_depth,
+                clock_domain = "sys",
+                csr_csv      = "analyzer.csv")
+            self.add_csr("analyzer")
+
         # Leds -------------------------------------------------------------------------------------
         self.submodules.leds = LedChaser(
             pads         = platform.request_all("user_led"),
             sys_clk_freq = sys_clk_freq)
 
+# Load BIOS ----------------------------------------------------------------------------------------
+
+def memwrite(wb, data, *, base, burst=255):
+    # Normalize to a flat 32-bit buffer once so each burst is a zero-copy view instead of a fresh
+    # list slice; .tolist() only materializes the burst actually put on the wire.
+    if isinstance(data, list):
+        from array import array
+        data = memoryview(array("I", data))
+    for i in range(0, len(data), burst):
+        wb.write(base + 4*i, data[i:i+burst].tolist())
+
+def load_bios(filename):
+    from litex import RemoteClient
+
+    try:
+        import numpy as np
+        size = os.path.getsize(filename)
+        if size & 3:
+            # Images that are not a whole number of words cannot be mapped as <u4; zero-pad the
+            # tail like the get_mem_data fallback (and the digilent_arty loader) do.
+            raw = np.fromfile(filename, dtype="u1")
+            rom_data = np.append(raw, np.zeros(-size % 4, dtype="u1")).view("<u4")
+        else:
+            # Map the file instead of reading it up-front: bursts are sliced straight out of the
+            # page cache and the whole BIOS is never materialized on the Python side.
+            rom_data = np.memmap(filename, dtype="<u4", mode="r")
+    except ImportError:
+        from litex.soc.integration.common import get_mem_data
+        rom_data = get_mem_data(filename, "little")
+
+    wb = RemoteClient()
+    wb.open()
+    memwrite(wb, rom_data, base=wb.mems.rom.base)
+    # Restart the CPU on the freshly loaded BIOS.
+    wb.regs.ctrl_reset.write(1)
+    wb.close()
+
 # Build --------------------------------------------------------------------------------------------
 
 def main():
-    parser = argparse.ArgumentParser(description="LiteX SoC on LPDDR4 Test Board")
+    parser = argparse.ArgumentParser(description="LiteX SoC on LPDDR4 Test Board", allow_abbrev=False)
     target = parser.add_argument_group(title="Target options")
-    target.add_argument("--build",            action="store_true",    help="Build bitstream")
-    target.add_argument("--load",             action="store_true",    help="Load bitstream")
     target.add_argument("--flash",            action="store_true",    help="Flash bitstream")
-    target.add_argument("--sys-clk-freq",     default=50e6,           help="System clock frequency")
-    target.add_argument("--iodelay-clk-freq", default=200e6,          help="IODELAYCTRL frequency")
+    target.add_argument("--incremental",      action="store_true",    help="Reuse the previous routed checkpoint for incremental place/route")
+    target.add_argument("--vivado-max-threads", default=min(os.cpu_count() or 1, 8), type=int, help="Maximum number of threads Vivado may use")
+    target.add_argument("--sys-clk-freq",     default=int(50e6),      type=lambda s: int(float(s)), help="System clock frequency")
+    target.add_argument("--iodelay-clk-freq", default=int(200e6),     type=lambda s: int(float(s)), help="IODELAYCTRL frequency")
     ethopts = target.add_mutually_exclusive_group()
     ethopts.add_argument("--with-ethernet",   action="store_true",    help="Add Ethernet")
     ethopts.add_argument("--with-etherbone",  action="store_true",    help="Add EtherBone")
@@ -136,17 +247,57 @@ def main():
     target.add_argument("--with-sdcard",      action="store_true",    help="Add SDCard")
     target.add_argument("--with-jtagbone",    action="store_true",    help="Add JTAGBone")
     target.add_argument("--with-uartbone",    action="store_true",    help="Add UartBone on 2nd serial")
+    target.add_argument("--with-analyzer",    action="store_true",    help="Add LiteScope analyzer on the DFI")
+    target.add_argument("--analyzer-depth",   default=128, type=int,  help="LiteScope analyzer depth")
+    target.add_argument("--analyzer-signals", default="all",          help="LiteScope analyzer signal set",
+        choices=["all", "ctrl", "data"])
+    target.add_argument("--load-bios",        default=None,           help="Load BIOS binary to ROM over an active Etherbone/JTAGBone connection and exit")
+    target.add_argument("--scan-pll",         action="store_true",    help="Scan for sys_clk_freq values achievable by the PLL and exit")
+    target.add_argument("--scan-pll-fmin",    default=30e6,  type=float, help="PLL scan start frequency")
+    target.add_argument("--scan-pll-fmax",    default=150e6, type=float, help="PLL scan stop frequency")
+    target.add_argument("--scan-pll-fstep",   default=1e6,   type=float, help="PLL scan frequency step")
+    target.add_argument("--debug-sdram",      action="store_true",    help="Dump SDRAM PHY/module settings during elaboration")
     parser.add_argument("--no-ident-version", action="store_false",   help="Disable build time output")
-    builder_args(parser)
-    soc_core_args(parser)
+    add_common_args(parser)
+    parser.set_defaults(l2_size=16384) # Wide DFI data path benefits from a larger L2 cache.
     vivado_build_args(parser)
     args = parser.parse_args()
 
     assert not (args.with_etherbone and args.eth_dynamic_ip)
 
+    if args.load_bios:
+        load_bios(args.load_bios)
+        sys.exit(0)
+
+    if args.scan_pll:
+        fmin  = args.scan_pll_fmin
+        fmax  = args.scan_pll_fmax
+        fstep = args.scan_pll_fstep
+        # The Platform (and its clk100 resource) is invariant across the sweep, so create it once
+        # and only re-run the PLL solver per frequency step.
+        platform = lpddr4_test_board.Platform()
+        clk100   = platform.request("clk100")
+        logging.getLogger("S7PLL").setLevel(logging.ERROR)
+        found   = []
+        n_steps = int(round((fmax - fmin) / fstep)) + 1
+        freqs   = [fmin + i * fstep for i in range(n_steps)]
+        for freq in freqs:
+            crg  = _CRG(platform, freq,
+                iodelay_clk_freq = args.iodelay_clk_freq,
+                clk100           = clk100)
+            try:
+                crg.pll.compute_config()
+            except ValueError:
+                continue
+            found.append(freq)
+        print("PLL configuration found for sys_clk_freq values:")
+        for freq in found:
+            print("  {:3.2f}MHz".format(freq/1e6))
+        sys.exit(0)
+
     soc = BaseSoC(
-        sys_clk_freq      = int(float(args.sys_clk_freq)),
-        iodelay_clk_freq  = int(float(args.iodelay_clk_freq)),
+        sys_clk_freq      = args.sys_clk_freq,
+        iodelay_clk_freq  = args.iodelay_clk_freq,
         with_ethernet     = args.with_ethernet,
         with_etherbone    = args.with_etherbone,
         eth_ip            = args.eth_ip,
@@ -155,18 +306,35 @@ def main():
         with_sdcard       = args.with_sdcard,
         with_jtagbone     = args.with_jtagbone,
         with_uartbone     = args.with_uartbone,
+        with_analyzer     = args.with_analyzer,
+        analyzer_depth    = args.analyzer_depth,
+        analyzer_signals  = args.analyzer_signals,
         ident_version     = args.no_ident_version,
+        debug_sdram       = args.debug_sdram,
+        l2_size           = args.l2_size,
         **soc_core_argdict(args))
     builder = Builder(soc, **builder_argdict(args))
+    soc.platform.toolchain.pre_synthesis_commands.append(
+        "set_param general.maxThreads {}".format(args.vivado_max_threads))
+    if args.incremental:
+        # Seed place/route from the previous routed design and save the new one for the next run.
+        toolchain = soc.platform.toolchain
+        dcp = os.path.join(builder.gateware_dir, "prev_routed.dcp")
+        if os.path.exists(dcp):
+            toolchain.pre_placement_commands.append("read_checkpoint -incremental {}".format(dcp))
+        toolchain.additional_commands.append("write_checkpoint -force {}".format(dcp))
     vns = builder.build(**vivado_build_argdict(args), run=args.build)
 
-    if args.load:
+    gateware = os.path.join(builder.gateware_dir, soc.build_name)
+
+    if args.load or args.flash:
         prog = soc.platform.create_programmer()
-        prog.load_bitstream(os.path.join(builder.gateware_dir, soc.build_name + ".bit"))
+
+    if args.load:
+        prog.load_bitstream(gateware + ".bit")
 
     if args.flash:
-        prog = soc.platform.create_programmer()
-        prog.flash(0, os.path.join(builder.gateware_dir, soc.build_name + ".bin"))
+        prog.flash(0, gateware + ".bin")
 
 if __name__ == "__main__":
     main()
@@ -13,6 +13,7 @@ import argparse
 from migen import *
 
 from litex_boards.platforms import arty
+from litex_boards.targets._common import add_common_args
 from litex.build.xilinx.vivado import vivado_build_args, vivado_build_argdict
 
 from litex.soc.cores.clock import *
@@ -26,10 +27,32 @@ from litedram.phy import s7ddrphy
 
 from liteeth.phy.mii import LiteEthPHYMII
 
-from litespi.modules import S25FL128L
-from litespi.opcodes import SpiNorFlashOpCodes as Codes
-from litespi.phy.generic import LiteSPIPHY
-from litespi import LiteSPI
+# Helpers ------------------------------------------------------------------------------------------
+
+def dump(obj):
+    # Buffer the whole dump and emit it with a single print instead of one write per field.
+    name  = obj.__class__.__name__
+    lines = [" " + name, " " + "-" * len(name)]
+    d = obj if isinstance(obj, dict) else vars(obj)
+    for var, val in d.items():
+        if var == "self":
+            continue
+        if type(val) is Signal:
+            val = f"Signal(reset={val.reset.value})"
+        lines.append(f"  {var}: {val}")
+    print("\n".join(lines))
+
+# The flash module description only depends on the read opcode; construct it once per process and
+# reuse it across BaseSoC instantiations (S25FL128L walks its opcode tables on construction).
+_flash_modules = {}
+
+def _flash_module(read_opcode):
+    mod = _flash_modules.get(read_opcode)
+    if mod is None:
+        from litespi.modules import S25FL128L
+        from litespi.opcodes import SpiNorFlashOpCodes as Codes
+        mod = _flash_modules[read_opcode] = S25FL128L(getattr(Codes, read_opcode))
+    return mod
 
 # CRG ----------------------------------------------------------------------------------------------
 
@@ -44,9 +67,12 @@ class _CRG(Module):
 
         # # #
 
+        cpu_reset = platform.request("cpu_reset")
+        clk100    = platform.request("clk100")
+
         self.submodules.pll = pll = S7PLL(speedgrade=-1)
-        self.comb += pll.reset.eq(~platform.request("cpu_reset") | self.rst)
-        pll.register_clkin(platform.request("clk100"), 100e6)
+        self.comb += pll.reset.eq(~cpu_reset | self.rst)
+        pll.register_clkin(clk100, 100e6)
         pll.create_clkout(self.cd_sys,       sys_clk_freq)
         pll.create_clkout(self.cd_sys4x,     4*sys_clk_freq)
         pll.create_clkout(self.cd_sys4x_dqs, 4*sys_clk_freq, phase=90)
@@ -61,7 +87,7 @@ class _CRG(Module):
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCCore):
-    def __init__(self, variant="a7-35", toolchain="vivado", sys_clk_freq=int(100e6), with_ethernet=False, with_etherbone=False, eth_ip="192.168.1.50", eth_dynamic_ip=False, ident_version=True, with_jtagbone=True, with_mapped_flash=False, **kwargs):
+    def __init__(self, variant="a7-35", toolchain="vivado", sys_clk_freq=int(100e6), with_ethernet=False, with_etherbone=False, eth_ip="192.168.1.50", eth_dynamic_ip=False, ident_version=True, with_jtagbone=True, with_mapped_flash=False, with_flash_master=False, flash_read_opcode="READ_1_1_4", debug_sdram=False, **kwargs):
         platform = arty.Platform(variant=variant, toolchain=toolchain)
 
         # SoCCore ----------------------------------------------------------------------------------
@@ -79,17 +105,24 @@ class BaseSoC(SoCCore):
                 memtype        = "DDR3",
                 nphases        = 4,
                 sys_clk_freq   = sys_clk_freq)
+            module = MT41K128M16(sys_clk_freq, "1:4")
             self.add_sdram("sdram",
                 phy           = self.ddrphy,
-                module        = MT41K128M16(sys_clk_freq, "1:4"),
+                module        = module,
                 l2_cache_size = kwargs.get("l2_size", 8192)
             )
+            if debug_sdram:
+                print("=" * 80)
+                dump(self.ddrphy.settings)
+                dump(module.geom_settings)
+                dump(module.timing_settings)
+                print("=" * 80)
 
         # Ethernet / Etherbone ---------------------------------------------------------------------
         if with_ethernet or with_etherbone:
             self.submodules.ethphy = LiteEthPHYMII(
-                clock_pads = self.platform.request("eth_clocks"),
-                pads       = self.platform.request("eth"))
+                clock_pads = platform.request("eth_clocks"),
+                pads       = platform.request("eth"))
             if with_ethernet:
                 self.add_ethernet(phy=self.ethphy, dynamic_ip=eth_dynamic_ip)
             if with_etherbone:
@@ -101,9 +134,14 @@ class BaseSoC(SoCCore):
 
         # Flash (through LiteSPI, experimental).
         if with_mapped_flash:
-            self.submodules.spiflash_phy  = LiteSPIPHY(platform.request("spiflash4x"), S25FL128L(Codes.READ_1_1_4))
-            self.submodules.spiflash_mmap = LiteSPI(self.spiflash_phy, clk_freq=sys_clk_freq, mmap_endianness=self.cpu.endianness)
-            spiflash_region = SoCRegion(origin=self.mem_map.get("spiflash", None), size=S25FL128L.total_size, cached=False)
+            # LiteSPI is only required (and imported) when mapped flash is enabled.
+            from litespi.phy.generic import LiteSPIPHY
+            from litespi import LiteSPI
+            flash_module = _flash_module(flash_read_opcode)
+            self.submodules.spiflash_phy  = LiteSPIPHY(platform.request("spiflash4x"), flash_module)
+            self.submodules.spiflash_mmap = LiteSPI(self.spiflash_phy, clk_freq=sys_clk_freq, mmap_endianness=self.cpu.endianness,
+                with_master=with_flash_master)
+            spiflash_region = SoCRegion(origin=self.mem_map.get("spiflash", None), size=flash_module.total_size, cached=False)
             self.bus.add_slave(name="spiflash", slave=self.spiflash_mmap.bus, region=spiflash_region)
 
         # Leds -------------------------------------------------------------------------------------
@@ -111,15 +149,46 @@ class BaseSoC(SoCCore):
             pads         = platform.request_all("user_led"),
             sys_clk_freq = sys_clk_freq)
 
+# Load BIOS ----------------------------------------------------------------------------------------
+
+def memwrite(wb, data, *, base, burst=255):
+    for i in range(0, len(data), burst):
+        wb.write(base + 4*i, data[i:i+burst])
+
+def load_bios(filename):
+    from litex import RemoteClient
+
+    try:
+        # One C-level read + conversion instead of a Python loop per 32-bit word.
+        import numpy as np
+        size = os.path.getsize(filename)
+        if size & 3:
+            # Zero-pad images that are not a whole number of words, like the struct fallback does.
+            raw      = np.fromfile(filename, dtype="u1")
+            rom_data = np.append(raw, np.zeros(-size % 4, dtype="u1")).view("<u4").tolist()
+        else:
+            rom_data = np.fromfile(filename, dtype="<u4").tolist()
+    except ImportError:
+        import struct
+        with open(filename, "rb") as f:
+            raw = f.read()
+        raw = raw.ljust((len(raw) + 3) & ~3, b"\x00") # Pad to a 32-bit boundary.
+        rom_data = [w[0] for w in struct.iter_unpack("<I", raw)]
+
+    wb = RemoteClient()
+    wb.open()
+    memwrite(wb, rom_data, base=wb.mems.rom.base)
+    # Restart the CPU on the freshly loaded BIOS.
+    wb.regs.ctrl_reset.write(1)
+    wb.close()
+
 # Build --------------------------------------------------------------------------------------------
 
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on Arty A7")
     parser.add_argument("--toolchain",           default="vivado",                 help="Toolchain use to build (default: vivado)")
-    parser.add_argument("--build",               action="store_true",              help="Build bitstream")
-    parser.add_argument("--load",                action="store_true",              help="Load bitstream")
     parser.add_argument("--variant",             default="a7-35",                  help="Board variant: a7-35 (default) or a7-100")
-    parser.add_argument("--sys-clk-freq",        default=100e6,                    help="System clock frequency (default: 100MHz)")
+    parser.add_argument("--sys-clk-freq",        default=int(100e6), type=lambda s: int(float(s)), help="System clock frequency (default: 100MHz)")
     ethopts = parser.add_mutually_exclusive_group()
     ethopts.add_argument("--with-ethernet",      action="store_true",              help="Enable Ethernet support")
     ethopts.add_argument("--with-etherbone",     action="store_true",              help="Enable Etherbone support")
@@ -132,17 +201,26 @@ def main():
     parser.add_argument("--no-ident-version",    action="store_false",             help="Disable build time output")
     parser.add_argument("--with-jtagbone",       action="store_true",              help="Enable Jtagbone support")
     parser.add_argument("--with-mapped-flash",   action="store_true",              help="Enable Memory Mapped Flash")
-    builder_args(parser)
-    soc_core_args(parser)
+    parser.add_argument("--with-flash-master",   action="store_true",              help="Enable LiteSPI master (CSR access) in addition to MMAP")
+    parser.add_argument("--flash-read-opcode",   default="READ_1_1_4",             help="Read opcode for Memory Mapped Flash",
+        choices=["READ_1_1_1", "READ_1_1_2", "READ_1_1_4", "READ_1_4_4"])
+    parser.add_argument("--debug-sdram",         action="store_true",              help="Dump SDRAM PHY/module settings during elaboration")
+    parser.add_argument("--load-bios",           default=None,                     help="Load BIOS binary to ROM over an active Etherbone/JTAGBone connection and exit")
+    parser.add_argument("--vivado-max-threads",  default=min(os.cpu_count() or 1, 8), type=int, help="Maximum number of threads Vivado may use")
+    add_common_args(parser)
     vivado_build_args(parser)
     args = parser.parse_args()
 
     assert not (args.with_etherbone and args.eth_dynamic_ip)
 
+    if args.load_bios:
+        load_bios(args.load_bios)
+        return
+
     soc = BaseSoC(
         variant           = args.variant,
         toolchain         = args.toolchain,
-        sys_clk_freq      = int(float(args.sys_clk_freq)),
+        sys_clk_freq      = args.sys_clk_freq,
         with_ethernet     = args.with_ethernet,
         with_etherbone    = args.with_etherbone,
         eth_ip            = args.eth_ip,
@@ -150,6 +228,9 @@ def main():
         ident_version     = args.no_ident_version,
         with_jtagbone     = args.with_jtagbone,
         with_mapped_flash = args.with_mapped_flash,
+        with_flash_master = args.with_flash_master,
+        flash_read_opcode = args.flash_read_opcode,
+        debug_sdram       = args.debug_sdram,
         **soc_core_argdict(args)
     )
     if args.sdcard_adapter == "numato":
@@ -162,6 +243,9 @@ def main():
         soc.add_sdcard()
     builder = Builder(soc, **builder_argdict(args))
     builder_kwargs = vivado_build_argdict(args) if args.toolchain == "vivado" else {}
+    if args.toolchain == "vivado":
+        soc.platform.toolchain.pre_synthesis_commands.append(
+            "set_param general.maxThreads {}".format(args.vivado_max_threads))
     builder.build(**builder_kwargs, run=args.build)
 
     if args.load:
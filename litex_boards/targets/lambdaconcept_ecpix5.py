@@ -60,6 +60,8 @@ class _CRG(Module):
         pll.register_clkin(clk100, 100e6)
         pll.create_clkout(self.cd_sys2x_i, 2*sys_clk_freq)
         pll.create_clkout(self.cd_init, 25e6)
+        pll_rst = Signal()
+        self.comb += pll_rst.eq(~pll.locked | self.reset | self.rst)
         self.specials += [
             Instance("ECLKSYNCB",
                 i_ECLKI = self.cd_sys2x_i.clk,
@@ -71,8 +73,8 @@ class _CRG(Module):
                 i_CLKI    = self.cd_sys2x.clk,
                 i_RST     = self.reset,
                 o_CDIVX   = self.cd_sys.clk),
-            AsyncResetSynchronizer(self.cd_sys,   ~pll.locked | self.reset | self.rst),
-            AsyncResetSynchronizer(self.cd_sys2x, ~pll.locked | self.reset | self.rst),
+            AsyncResetSynchronizer(self.cd_sys,   pll_rst),
+            AsyncResetSynchronizer(self.cd_sys2x, pll_rst),
         ]
 
 # BaseSoC ------------------------------------------------------------------------------------------
@@ -58,6 +58,8 @@ class _CRG(Module):
         pll.register_clkin(clk25, 25e6)
         pll.create_clkout(self.cd_sys2x_i, 2*sys_clk_freq)
         pll.create_clkout(self.cd_init, 24e6)
+        pll_rst = Signal()
+        self.comb += pll_rst.eq(~pll.locked | self.reset)
         self.specials += [
             Instance("ECLKBRIDGECS",
                 i_CLK0   = self.cd_sys2x_i.clk,
@@ -73,8 +75,8 @@ class _CRG(Module):
                 i_CLKI    = self.cd_sys2x.clk,
                 i_RST     = self.reset,
                 o_CDIVX   = self.cd_sys.clk),
-            AsyncResetSynchronizer(self.cd_sys,    ~pll.locked | self.reset),
-            AsyncResetSynchronizer(self.cd_sys2x,  ~pll.locked | self.reset),
+            AsyncResetSynchronizer(self.cd_sys,    pll_rst),
+            AsyncResetSynchronizer(self.cd_sys2x,  pll_rst),
         ]
 
         # USB PLL
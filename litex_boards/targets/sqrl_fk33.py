@@ -12,6 +12,7 @@ import argparse
 from migen import *
 
 from litex_boards.platforms import fk33
+from litex_boards.targets._common import add_common_args
 
 from litex.soc.cores.clock import *
 from litex.soc.integration.soc_core import *
@@ -100,13 +101,10 @@ class BaseSoC(SoCCore):
 
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on FK33")
-    parser.add_argument("--build",        action="store_true", help="Build bitstream")
-    parser.add_argument("--load",         action="store_true", help="Load bitstream")
     parser.add_argument("--sys-clk-freq", default=125e6,       help="System clock frequency (default: 125MHz)")
     parser.add_argument("--with-pcie",    action="store_true", help="Enable PCIe support")
     parser.add_argument("--driver",       action="store_true", help="Generate PCIe driver")
-    builder_args(parser)
-    soc_core_args(parser)
+    add_common_args(parser)
     args = parser.parse_args()
 
     soc = BaseSoC(
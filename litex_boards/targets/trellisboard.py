@@ -86,6 +86,8 @@ class _CRGSDRAM(Module):
         pll.register_clkin(clk12, 12e6)
         pll.create_clkout(self.cd_sys2x_i, 2*sys_clk_freq)
         pll.create_clkout(self.cd_init,   25e6)
+        pll_rst = Signal()
+        self.comb += pll_rst.eq(~pll.locked | self.reset)
         self.specials += [
             Instance("ECLKBRIDGECS",
                 i_CLK0   = self.cd_sys2x_i.clk,
@@ -102,8 +104,8 @@ class _CRGSDRAM(Module):
                 i_CLKI    = self.cd_sys2x.clk,
                 i_RST     = self.reset,
                 o_CDIVX   = self.cd_sys.clk),
-            AsyncResetSynchronizer(self.cd_sys,    ~pll.locked | self.reset),
-            AsyncResetSynchronizer(self.cd_sys2x,  ~pll.locked | self.reset),
+            AsyncResetSynchronizer(self.cd_sys,    pll_rst),
+            AsyncResetSynchronizer(self.cd_sys2x,  pll_rst),
         ]
 
         self.comb += platform.request("dram_vtt_en").eq(1)
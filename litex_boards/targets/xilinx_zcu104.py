@@ -14,6 +14,7 @@ from migen import *
 from migen.genlib.resetsync import AsyncResetSynchronizer
 
 from litex_boards.platforms import zcu104
+from litex_boards.targets._common import add_common_args
 
 from litex.soc.cores.clock import *
 from litex.soc.integration.soc_core import *
@@ -90,11 +91,8 @@ class BaseSoC(SoCCore):
 
 def main():
     parser = argparse.ArgumentParser(description="LiteX SoC on ZCU104")
-    parser.add_argument("--build",        action="store_true", help="Build bitstream")
-    parser.add_argument("--load",         action="store_true", help="Load bitstream")
     parser.add_argument("--sys-clk-freq", default=125e6,       help="System clock frequency (default: 125MHz)")
-    builder_args(parser)
-    soc_core_args(parser)
+    add_common_args(parser)
     args = parser.parse_args()
 
     soc = BaseSoC(